@@ -5,24 +5,40 @@ Simulates realistic sensor data for testing the cloud infrastructure.
 Supports multiple simulation modes and configurable parameters.
 """
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import random
 import time
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+import json
+import queue
+import threading
 import sys
-from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    # Optional: faster JSON encoding when orjson is installed
+    from orjson import dumps as json_dumps
+except ImportError:
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
 # ═══════════════════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════
 
+# Only read the .env file when the environment doesn't already provide the key.
+# Note: once SUPABASE_KEY is exported, a SUPABASE_URL kept in .env is ignored too.
+if not os.environ.get("SUPABASE_KEY"):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # python-dotenv is optional; rely on the environment alone
+
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://yhgyeaygmampbvfanumx.supabase.co")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY", "")  # Set via environment variable
 API_ENDPOINT = f"{SUPABASE_URL}/rest/v1/readings"
@@ -31,10 +47,16 @@ ALERTS_ENDPOINT = f"{SUPABASE_URL}/rest/v1/alerts"
 # Simulation settings
 INTERVAL_SECONDS = 30
 MAX_RETRIES = 3
-RETRY_DELAY = 5
+RETRY_DELAY = 5       # Base delay, doubled on every retry
+MAX_RETRY_DELAY = 30
+READING_BUFFER_SIZE = 4096  # Readings pre-generated per refill
+BATCH_SIZE = 4  # Readings per POST (PostgREST inserts a JSON array as multiple rows)
+SEND_QUEUE_SIZE = 64  # Readings waiting to be sent before new ones are dropped
+SHUTDOWN_TIMEOUT = 5  # Seconds Ctrl+C waits for the sender to flush before giving up
+ERROR_BODY_LIMIT = 512  # Max bytes of an error response body to print
 
 
-class SimulationMode(Enum):
+class SimulationMode(str, Enum):
     """Different simulation scenarios for testing"""
     NORMAL = "normal"           # Typical healthy plant conditions
     DRY_SOIL = "dry_soil"       # Simulates drought conditions
@@ -43,7 +65,21 @@ class SimulationMode(Enum):
     RANDOM = "random"           # Fully random values
 
 
-@dataclass
+# (soil, light, temp, humidity) ranges per mode, inclusive like random.randint.
+# RANDOM uses the full SensorThresholds ranges instead.
+MODE_RANGES = {
+    # Normal healthy plant conditions
+    SimulationMode.NORMAL: ((2000, 2400), (1000, 1500), (26, 30), (50, 70)),
+    # Drought - soil is an offset around a base that falls as readings go on
+    SimulationMode.DRY_SOIL: ((-100, 100), (1200, 1600), (30, 34), (35, 50)),
+    # Heat wave conditions
+    SimulationMode.HOT_WEATHER: ((1600, 2000), (1500, 1800), (34, 40), (30, 45)),
+    # Nighttime conditions
+    SimulationMode.NIGHT_TIME: ((2000, 2400), (0, 200), (20, 25), (60, 80)),
+}
+
+
+@dataclass(frozen=True, slots=True)
 class SensorThresholds:
     """Defines healthy ranges for each sensor"""
     soil_min: int = 1800
@@ -56,6 +92,9 @@ class SensorThresholds:
     humidity_max: float = 80.0
 
 
+# Thresholds never change per simulator, so every instance shares this one
+DEFAULT_THRESHOLDS = SensorThresholds()
+
 # ═══════════════════════════════════════════════════════════════════
 # SENSOR DATA GENERATOR
 # ═══════════════════════════════════════════════════════════════════
@@ -63,71 +102,92 @@ class SensorThresholds:
 class SensorSimulator:
     """Generates realistic sensor data based on simulation mode"""
     
+    __slots__ = (
+        "mode", "thresholds", "_reading_count", "_gen",
+        "_buf_size", "_buf_idx", "_soil", "_light", "_temp", "_humidity",
+    )
+    
     def __init__(self, mode: SimulationMode = SimulationMode.NORMAL):
         self.mode = mode
-        self.thresholds = SensorThresholds()
+        self.thresholds = DEFAULT_THRESHOLDS
         self._reading_count = 0
+        # Readings are pre-generated in chunks; start exhausted so the first read refills
+        self._buf_size = READING_BUFFER_SIZE
+        self._buf_idx = self._buf_size
+        # Resolve the generator for this mode once instead of on every reading
+        self._gen = (self._generate_dry_soil_reading if mode == SimulationMode.DRY_SOIL
+                     else self._generate_buffered_reading)
         
     def generate_reading(self) -> Dict[str, Any]:
-        """Generate a sensor reading based on current mode"""
-        self._reading_count += 1
+        """Generate a sensor reading based on current mode.
         
-        if self.mode == SimulationMode.DRY_SOIL:
-            return self._generate_dry_soil_reading()
-        elif self.mode == SimulationMode.HOT_WEATHER:
-            return self._generate_hot_weather_reading()
-        elif self.mode == SimulationMode.NIGHT_TIME:
-            return self._generate_night_reading()
-        elif self.mode == SimulationMode.RANDOM:
-            return self._generate_random_reading()
-        else:
-            return self._generate_normal_reading()
+        Each call returns a new dict: readings sit in the send queue and batch
+        buffer after this returns, so they must not share storage.
+        """
+        self._reading_count += 1
+        return self._gen()
+    
+    def _refill(self):
+        """Pre-generate the next chunk of readings as plain Python lists"""
+        # tolist() converts the whole chunk to Python ints/floats in one C-level pass,
+        # so handing out a reading is just list indexing
+        self._soil, self._light, self._temp, self._humidity = (
+            column.tolist() for column in self._draw(self._buf_size)
+        )
+        self._buf_idx = 0
+    
+    def _next_index(self) -> int:
+        """Position of the next unused reading in the buffers"""
+        i = self._buf_idx
+        if i == self._buf_size:
+            self._refill()
+            i = 0
+        self._buf_idx = i + 1
+        return i
     
-    def _generate_normal_reading(self) -> Dict[str, Any]:
-        """Normal healthy plant conditions"""
+    def _generate_buffered_reading(self) -> Dict[str, Any]:
+        """Next pre-generated reading for modes with fixed ranges"""
+        i = self._next_index()
         return {
-            "soil": random.randint(2000, 2400),
-            "light": random.randint(1000, 1500),
-            "temp": round(random.uniform(26, 30), 1),
-            "humidity": round(random.uniform(50, 70), 1)
+            "soil": self._soil[i],
+            "light": self._light[i],
+            "temp": self._temp[i],
+            "humidity": self._humidity[i]
         }
     
     def _generate_dry_soil_reading(self) -> Dict[str, Any]:
         """Simulates drought - soil moisture decreasing over time"""
-        base_soil = max(1200, 2400 - (self._reading_count * 50))
-        return {
-            "soil": random.randint(base_soil - 100, base_soil + 100),
-            "light": random.randint(1200, 1600),
-            "temp": round(random.uniform(30, 34), 1),
-            "humidity": round(random.uniform(35, 50), 1)
-        }
+        reading = self._generate_buffered_reading()
+        reading["soil"] += max(1200, 2400 - (self._reading_count * 50))
+        return reading
     
-    def _generate_hot_weather_reading(self) -> Dict[str, Any]:
-        """Simulates heat wave conditions"""
-        return {
-            "soil": random.randint(1600, 2000),
-            "light": random.randint(1500, 1800),
-            "temp": round(random.uniform(34, 40), 1),
-            "humidity": round(random.uniform(30, 45), 1)
-        }
+    def _ranges(self):
+        """Sensor ranges for the current mode (RANDOM uses the full thresholds)"""
+        if self.mode == SimulationMode.RANDOM:
+            t = self.thresholds
+            return ((t.soil_min, t.soil_max), (t.light_min, t.light_max),
+                    (t.temp_min, t.temp_max), (t.humidity_min, t.humidity_max))
+        return MODE_RANGES.get(self.mode, MODE_RANGES[SimulationMode.NORMAL])
     
-    def _generate_night_reading(self) -> Dict[str, Any]:
-        """Simulates nighttime conditions"""
-        return {
-            "soil": random.randint(2000, 2400),
-            "light": random.randint(0, 200),
-            "temp": round(random.uniform(20, 25), 1),
-            "humidity": round(random.uniform(60, 80), 1)
-        }
+    def _draw(self, n: int):
+        """Draw n raw (soil, light, temp, humidity) values for the current mode"""
+        (soil_lo, soil_hi), (light_lo, light_hi), (temp_lo, temp_hi), (hum_lo, hum_hi) = self._ranges()
+        return (
+            np.random.randint(soil_lo, soil_hi + 1, n),
+            np.random.randint(light_lo, light_hi + 1, n),
+            np.round(np.random.uniform(temp_lo, temp_hi, n), 1),
+            np.round(np.random.uniform(hum_lo, hum_hi, n), 1)
+        )
     
-    def _generate_random_reading(self) -> Dict[str, Any]:
-        """Fully random values within hardware limits"""
-        return {
-            "soil": random.randint(self.thresholds.soil_min, self.thresholds.soil_max),
-            "light": random.randint(self.thresholds.light_min, self.thresholds.light_max),
-            "temp": round(random.uniform(self.thresholds.temp_min, self.thresholds.temp_max), 1),
-            "humidity": round(random.uniform(self.thresholds.humidity_min, self.thresholds.humidity_max), 1)
-        }
+    def generate_batch(self, n: int) -> Dict[str, np.ndarray]:
+        """Generate n readings at once as arrays - for stress testing"""
+        soil, light, temp, humidity = self._draw(n)
+        if self.mode == SimulationMode.DRY_SOIL:
+            counts = np.arange(self._reading_count + 1, self._reading_count + n + 1)
+            soil += np.maximum(1200, 2400 - counts * 50)
+        self._reading_count += n
+        
+        return {"soil": soil, "light": light, "temp": temp, "humidity": humidity}
     
     def generate_alert_reading(self) -> Dict[str, Any]:
         """Generate a reading that will trigger alerts - randomly picks an alert type"""
@@ -167,7 +227,6 @@ class SensorSimulator:
         elif chosen_alert == "humidity_low":
             reading["humidity"] = round(random.uniform(20, 34), 1)  # Below 35 threshold
         
-        print(f"  ⚡ ALERT TEST: Triggering '{chosen_alert}' alert!")
         reading["_alert_type"] = chosen_alert  # Store alert type for later use
         return reading
 
@@ -188,22 +247,56 @@ class SupabaseClient:
             "Content-Type": "application/json",
             "Prefer": "return=minimal"
         }
+        # Keep-alive session so every POST reuses the same TLS connection. Only the
+        # sender thread uses it, one request at a time, so in practice a single
+        # pooled connection carries all readings and alerts.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        self._buffer: List[Dict[str, Any]] = []
+    
+    @property
+    def pending(self) -> int:
+        """Number of readings waiting for the next flush"""
+        return len(self._buffer)
+    
+    def enqueue(self, data: Dict[str, Any]) -> None:
+        """Buffer a reading until the next flush"""
+        self._buffer.append(data)
+    
+    def flush(self, force: bool = False) -> Optional[bool]:
+        """Send buffered readings as one batch once BATCH_SIZE is reached.
+        
+        Returns None if nothing was sent, otherwise whether the batch was saved.
+        A failed batch is dropped, just like a single failed reading.
+        """
+        if not self._buffer or (not force and len(self._buffer) < BATCH_SIZE):
+            return None
+        
+        batch, self._buffer = self._buffer, []
+        return self.send_reading(batch)
     
-    def send_reading(self, data: Dict[str, Any]) -> bool:
-        """Send sensor reading to Supabase with retry logic"""
+    def send_reading(self, data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> bool:
+        """Send a sensor reading (or a list of readings) to Supabase with retry logic"""
+        body = json_dumps(data)  # Encode once, not on every retry
         for attempt in range(1, MAX_RETRIES + 1):
             try:
-                response = requests.post(
+                # Stream so an error body is only read up to ERROR_BODY_LIMIT
+                with self.session.post(
                     API_ENDPOINT,
-                    headers=self.headers,
-                    json=data,
-                    timeout=10
-                )
-                
-                if response.status_code in (200, 201):
-                    return True
-                else:
-                    print(f"  ⚠️  API returned {response.status_code}: {response.text}")
+                    data=body,
+                    timeout=10,
+                    stream=True
+                ) as response:
+                    if response.status_code in (200, 201):
+                        # Consume the empty return=minimal body so the connection
+                        # goes back to the pool instead of being closed
+                        _ = response.content
+                        return True
+                    print(f"  ⚠️  API returned {response.status_code}: {self._error_body(response)}")
+                    # Client errors (bad key, bad payload) won't succeed on retry
+                    if 400 <= response.status_code < 500 and response.status_code != 429:
+                        return False
                     
             except requests.exceptions.Timeout:
                 print(f"  ⏱️  Timeout on attempt {attempt}/{MAX_RETRIES}")
@@ -211,12 +304,25 @@ class SupabaseClient:
                 print(f"  🔌 Connection error on attempt {attempt}/{MAX_RETRIES}")
             except Exception as e:
                 print(f"  ❌ Error: {e}")
+                return False
             
             if attempt < MAX_RETRIES:
-                time.sleep(RETRY_DELAY)
+                time.sleep(self._retry_delay(attempt))
         
         return False
     
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        """Exponential backoff with jitter, capped at MAX_RETRY_DELAY"""
+        delay = RETRY_DELAY * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        return min(delay, MAX_RETRY_DELAY)
+    
+    @staticmethod
+    def _error_body(response: requests.Response) -> str:
+        """Read at most ERROR_BODY_LIMIT bytes of an error response for logging"""
+        body = response.raw.read(ERROR_BODY_LIMIT, decode_content=True)
+        return body.decode("utf-8", errors="replace")
+    
     def send_alert(self, alert_type: str, data: Dict[str, Any]) -> bool:
         """Send alert to Supabase alerts table"""
         # The alerts table only has: id, type, triggered_at
@@ -225,10 +331,9 @@ class SupabaseClient:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 ALERTS_ENDPOINT,
-                headers=self.headers,
-                json=alert_data,
+                data=json_dumps(alert_data),
                 timeout=10
             )
             
@@ -255,49 +360,184 @@ def print_banner():
     print("═" * 60)
     print(f"  📡 Endpoint: {SUPABASE_URL}")
     print(f"  ⏱️  Interval: {INTERVAL_SECONDS} seconds")
+    print(f"  📦 Batch size: {BATCH_SIZE} readings")
     print("═" * 60 + "\n")
 
 
-def print_reading(data: Dict[str, Any], success: bool, count: int):
-    """Pretty-print a sensor reading"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    status = "✅" if success else "❌"
+_READING_FMT = (
+    "[{timestamp}] Reading #{count} {status}\n"
+    "  💧 Soil: {soil:>5}  |  💡 Light: {light:>5}\n"
+    "  🌡️  Temp: {temp:>5}°C |  💨 Humidity: {humidity:>5}%\n"
+    + "-" * 50 + "\n"
+    "  {health}\n"
+)
+
+# (sensor, low, high, low message, high message) checked in order by the health helpers
+_HEALTH_LIMITS = (
+    ("soil", 1800, 2600, "🚨 Soil too dry!", "💦 Soil too wet!"),
+    ("temp", 20.0, 35.0, "❄️ Too cold!", "🔥 Too hot!"),
+    ("light", 500, float("inf"), "🌑 Low light!", None),
+    ("humidity", 40.0, 80.0, "🏜️ Low humidity!", "🌫️ High humidity!"),
+)
+_LOWS = np.array([limit[1] for limit in _HEALTH_LIMITS])
+_HIGHS = np.array([limit[2] for limit in _HEALTH_LIMITS])
+
+
+# Last formatted timestamp, reused while the wall-clock second is unchanged
+_last_ts_sec = 0
+_last_ts_str = ""
+
+
+def _timestamp() -> str:
+    """Current time as HH:MM:SS, formatted at most once per second"""
+    global _last_ts_sec, _last_ts_str
+    now = int(time.time())
+    if now != _last_ts_sec:
+        _last_ts_str = time.strftime("%H:%M:%S", time.localtime(now))
+        _last_ts_sec = now
+    return _last_ts_str
+
+
+def print_reading(data: Dict[str, Any], success: Optional[bool], count: int,
+                  summary: str = "", header: str = ""):
+    """Pretty-print a sensor reading and its health in a single write + flush.
+    
+    success is None while the reading is still buffered.
+    """
+    timestamp = _timestamp()
+    status = "⏳" if success is None else "✅" if success else "❌"
     
-    print(f"[{timestamp}] Reading #{count} {status}")
-    print(f"  💧 Soil: {data['soil']:>5}  |  💡 Light: {data['light']:>5}")
-    print(f"  🌡️  Temp: {data['temp']:>5}°C |  💨 Humidity: {data['humidity']:>5}%")
-    print("-" * 50)
+    sys.stdout.write(header + _READING_FMT.format_map({
+        "timestamp": timestamp, "count": count, "status": status,
+        "health": get_health_status(data), **data
+    }) + summary + "\n")
+    sys.stdout.flush()
+
+
+def _format_health(issues) -> str:
+    return " | ".join(issues) if issues else "✅ Plant healthy!"
 
 
 def get_health_status(data: Dict[str, Any]) -> str:
     """Analyze reading and return health status"""
-    issues = []
-    
-    if data['soil'] < 1800:
-        issues.append("🚨 Soil too dry!")
-    elif data['soil'] > 2600:
-        issues.append("💦 Soil too wet!")
-    
-    if data['temp'] > 35:
-        issues.append("🔥 Too hot!")
-    elif data['temp'] < 20:
-        issues.append("❄️ Too cold!")
-    
-    if data['light'] < 500:
-        issues.append("🌑 Low light!")
-    
-    if data['humidity'] < 40:
-        issues.append("🏜️ Low humidity!")
-    elif data['humidity'] > 80:
-        issues.append("🌫️ High humidity!")
+    return _format_health(tuple(
+        low_msg if data[sensor] < low else high_msg
+        for sensor, low, high, low_msg, high_msg in _HEALTH_LIMITS
+        if data[sensor] < low or data[sensor] > high
+    ))
+
+
+def get_health_status_batch(soil: np.ndarray, temp: np.ndarray,
+                            light: np.ndarray, humidity: np.ndarray) -> List[str]:
+    """Health status for many readings at once (e.g. from generate_batch)"""
+    values = np.column_stack((soil, temp, light, humidity))
+    # One bit per sensor: low flags in bits 0-3, high flags in bits 4-7
+    bits = 1 << np.arange(len(_HEALTH_LIMITS))
+    codes = ((values < _LOWS) @ bits) | (((values > _HIGHS) @ bits) << len(_HEALTH_LIMITS))
     
-    return " | ".join(issues) if issues else "✅ Plant healthy!"
+    # Only build each distinct status string once
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    statuses = []
+    for code in unique_codes.tolist():
+        issues = []
+        for i, (_, _, _, low_msg, high_msg) in enumerate(_HEALTH_LIMITS):
+            if code >> i & 1:
+                issues.append(low_msg)
+            elif code >> (i + len(_HEALTH_LIMITS)) & 1:
+                issues.append(high_msg)
+        statuses.append(_format_health(issues))
+    return [statuses[i] for i in inverse.ravel().tolist()]
 
 
 # ═══════════════════════════════════════════════════════════════════
 # MAIN EXECUTION
 # ═══════════════════════════════════════════════════════════════════
 
+def produce_readings(simulator: SensorSimulator, readings: queue.Queue,
+                     stop: threading.Event, stats: Dict[str, int]):
+    """Generate readings on a fixed schedule and queue them for sending"""
+    reading_count = 0
+    next_tick = time.monotonic()
+    
+    while not stop.is_set():
+        reading_count += 1
+        stats["readings"] = reading_count
+        alert_type = None
+        
+        # Every 10th reading, generate an alert-triggering reading
+        if reading_count % 10 == 0:
+            data = simulator.generate_alert_reading()
+            alert_type = data.pop("_alert_type", None)  # Extract and remove alert type
+        else:
+            data = simulator.generate_reading()
+        
+        try:
+            readings.put_nowait((reading_count, data, alert_type))
+        except queue.Full:
+            stats["dropped"] += 1
+            print(f"  🗑️  Send queue full, dropped reading #{reading_count}\n")
+        
+        # Sleep until the next scheduled tick so request latency doesn't add drift
+        next_tick += INTERVAL_SECONDS
+        now = time.monotonic()
+        if next_tick < now:
+            skipped = 0
+            while next_tick < now:
+                next_tick += INTERVAL_SECONDS
+                skipped += 1
+            print(f"  ⏩ Running behind, skipped {skipped} interval(s)\n")
+        stop.wait(max(0.0, next_tick - time.monotonic()))
+
+
+def send_readings(client: SupabaseClient, readings: queue.Queue, stats: Dict[str, int]):
+    """Send queued readings until a None sentinel arrives, batching any backlog"""
+    while True:
+        items = [readings.get()]
+        # Pick up any backlog, but never more than one batch per POST
+        while client.pending + len(items) < BATCH_SIZE and not readings.empty():
+            items.append(readings.get_nowait())
+        # The sentinel is queued last, after the producer has stopped
+        stopping = items[-1] is None
+        if stopping:
+            items.pop()
+        
+        for _, data, _ in items:
+            client.enqueue(data)
+        batch_size = client.pending
+        has_alert = any(alert_type for _, _, alert_type in items)
+        # Alert readings are flushed right away so the alert follows its reading
+        success = client.flush(force=stopping or has_alert)
+        
+        if success:
+            stats["saved"] += batch_size
+        elif success is False:
+            stats["failed"] += batch_size
+        
+        for i, (count, data, alert_type) in enumerate(items):
+            header = ""
+            if alert_type:
+                header = (
+                    "\n" + "="*50 + "\n"
+                    "  🚨 ALERT TEST READING (every 10th reading)\n"
+                    + "="*50 + "\n"
+                    f"  ⚡ ALERT TEST: Triggering '{alert_type}' alert!\n"
+                )
+            summary = ""
+            if success is not None and i == len(items) - 1:
+                summary = f"  📊 Success rate: {stats['saved']}/{count} ({100*stats['saved']/count:.1f}%)\n"
+            print_reading(data, success, count, summary, header)
+            
+            # If this was an alert reading, save the alert once its reading is shown
+            if success and alert_type:
+                client.send_alert(alert_type, data)
+        
+        if stopping:
+            # A final flush of readings already shown as ⏳ still needs a result line
+            if not items and success is not None:
+                print(f"  📦 Flushed {batch_size} buffered readings {'✅' if success else '❌'}\n")
+            return
+
+
 def main():
     """Main execution loop"""
     # Parse command line argument for simulation mode
@@ -317,45 +557,50 @@ def main():
     simulator = SensorSimulator(mode)
     client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
     
-    reading_count = 0
-    success_count = 0
+    # Generation and sending run on separate threads so a slow POST never delays
+    # the next reading. Each counter has a single writer thread.
+    readings: queue.Queue = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+    stop = threading.Event()
+    stats = {"readings": 0, "dropped": 0, "saved": 0, "failed": 0}
+    producer = threading.Thread(target=produce_readings, args=(simulator, readings, stop, stats), daemon=True)
+    consumer = threading.Thread(target=send_readings, args=(client, readings, stats), daemon=True)
+    producer.start()
+    consumer.start()
     
     try:
-        while True:
-            reading_count += 1
-            alert_type = None
-            
-            # Every 10th reading, generate an alert-triggering reading
-            if reading_count % 10 == 0:
-                print("\n" + "="*50)
-                print("  🚨 ALERT TEST READING (every 10th reading)")
-                print("="*50)
-                data = simulator.generate_alert_reading()
-                alert_type = data.pop("_alert_type", None)  # Extract and remove alert type
-            else:
-                data = simulator.generate_reading()
-            
-            success = client.send_reading(data)
-            
-            if success:
-                success_count += 1
-                # If this was an alert reading, save the alert to database
-                if alert_type:
-                    client.send_alert(alert_type, data)
-            
-            print_reading(data, success, reading_count)
-            print(f"  {get_health_status(data)}")
-            print(f"  📊 Success rate: {success_count}/{reading_count} ({100*success_count/reading_count:.1f}%)\n")
-            
-            time.sleep(INTERVAL_SECONDS)
-            
+        while producer.is_alive() and consumer.is_alive():
+            producer.join(0.5)
+        # Only reached if a worker thread died; its traceback is already printed
+        crashed = True
     except KeyboardInterrupt:
-        print("\n\n" + "═" * 60)
-        print("  🛑 Simulator stopped by user")
-        print(f"  📊 Total readings: {reading_count}")
-        print(f"  ✅ Successful: {success_count}")
-        print(f"  ❌ Failed: {reading_count - success_count}")
-        print("═" * 60 + "\n")
+        crashed = False
+    
+    stop.set()
+    producer.join(SHUTDOWN_TIMEOUT)
+    # Give the sender a bounded chance to flush whatever is still queued or buffered
+    if consumer.is_alive():
+        try:
+            readings.put(None, timeout=SHUTDOWN_TIMEOUT)
+            consumer.join(SHUTDOWN_TIMEOUT)
+        except queue.Full:
+            pass
+    
+    reading_count = stats["readings"]
+    success_count = stats["saved"]
+    failed_count = stats["failed"] + stats["dropped"]
+    unsent_count = reading_count - success_count - failed_count
+    print("\n\n" + "═" * 60)
+    print("  💥 Simulator stopped: a worker thread crashed" if crashed
+          else "  🛑 Simulator stopped by user")
+    print(f"  📊 Total readings: {reading_count}")
+    print(f"  ✅ Successful: {success_count}")
+    print(f"  ❌ Failed: {failed_count}")
+    if unsent_count:
+        print(f"  ⏳ Unsent (still queued or in flight): {unsent_count}")
+    print("═" * 60 + "\n")
+    
+    if crashed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":